@@ -0,0 +1,183 @@
+import argparse
+import math
+import os
+import sqlite3
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+matplotlib.use('Agg')  # Render straight to files, no display needed (and safe in worker processes)
+import matplotlib.pyplot as plt
+from matplotlib.ticker import MaxNLocator
+
+import event_store
+import model_compare
+
+MARKERS = ['o', 's', '^', 'D', 'v', 'P']
+
+def wilson_interval(successes, count, z=1.96):
+    """95% Wilson score interval for a success rate, well behaved for small bins and rates near 0 or 1."""
+    if count == 0:
+        return 0.0, 0.0
+    p = successes / count
+    denom = 1 + z ** 2 / count
+    center = (p + z ** 2 / (2 * count)) / denom
+    half = z * math.sqrt(p * (1 - p) / count + z ** 2 / (4 * count ** 2)) / denom
+    return max(0.0, center - half), min(1.0, center + half)
+
+def bin_points(bins):
+    """Turns a calibration bin dict into sorted (pred prob, actual rate, successes, count) points."""
+    points = []
+    for b in sorted(bins.keys()):
+        data = bins[b]
+        if data['count'] > 0:
+            points.append((b, data['actual'] / data['count'], data['actual'], data['count']))
+    return points
+
+def new_reliability_axes(title):
+    fig, ax = plt.subplots()
+    ax.plot([0, 1], [0, 1], linestyle='--', color='gray', label='Perfect Calibration')
+    ax.set_xlim(0, 1)
+    ax.set_ylim(0, 1)
+    ax.set_xlabel('Predicted Probability')
+    ax.set_ylabel('Actual Success Rate')
+    ax.set_title(title)
+    ax.grid(True, linestyle=':', alpha=0.7)
+    return fig, ax
+
+def plot_reliability(stats, output_file, title, dpi=300):
+    """Reliability diagram: actual success rate per predicted-probability bin, one line per model."""
+    fig, ax = new_reliability_axes(title)
+    for index, (name, model_stats) in enumerate(stats['models'].items()):
+        points = bin_points(model_stats['bins'])
+        ax.plot([p[0] for p in points], [p[1] for p in points], linewidth=2,
+                marker=MARKERS[index % len(MARKERS)], label=model_compare.model_label(index, name))
+    ax.legend(loc='upper left')
+    fig.tight_layout()
+    fig.savefig(output_file, dpi=dpi)
+    plt.close(fig)
+
+def plot_reliability_error(stats, output_file, title, dpi=300):
+    """Reliability diagram with a 95% confidence interval on each bin's actual success rate."""
+    fig, ax = new_reliability_axes(title)
+    for index, (name, model_stats) in enumerate(stats['models'].items()):
+        points = bin_points(model_stats['bins'])
+        intervals = [wilson_interval(p[2], p[3]) for p in points]
+        lower = [p[1] - lo for p, (lo, hi) in zip(points, intervals)]
+        upper = [hi - p[1] for p, (lo, hi) in zip(points, intervals)]
+        ax.errorbar([p[0] for p in points], [p[1] for p in points], yerr=[lower, upper],
+                    linewidth=2, capsize=4, marker=MARKERS[index % len(MARKERS)],
+                    label=f"{model_compare.model_label(index, name)} (95% CI)")
+    ax.legend(loc='upper left')
+    fig.tight_layout()
+    fig.savefig(output_file, dpi=dpi)
+    plt.close(fig)
+
+def plot_by_hits(stats, output_file, title, dpi=300):
+    """Actual success rate against hits taken, with each model's mean prediction for the same events."""
+    fig, ax = plt.subplots()
+    hits = sorted(stats['hits'].keys())
+    totals = [stats['hits'][h]['total'] for h in hits]
+    actual = [stats['hits'][h]['successes'] / t for h, t in zip(hits, totals)]
+    intervals = [wilson_interval(stats['hits'][h]['successes'], t) for h, t in zip(hits, totals)]
+
+    ax.errorbar(hits, actual, yerr=[[a - lo for a, (lo, hi) in zip(actual, intervals)],
+                                    [hi - a for a, (lo, hi) in zip(actual, intervals)]],
+                color='black', linewidth=2, capsize=4, marker='o', label='Actual (95% CI)')
+    for index, name in enumerate(stats['models']):
+        predicted = [stats['hits'][h]['predicted'][name] / t for h, t in zip(hits, totals)]
+        ax.plot(hits, predicted, linewidth=2, linestyle='--',
+                marker=MARKERS[index % len(MARKERS)], label=model_compare.model_label(index, name))
+
+    ax.set_ylim(0, 1)
+    ax.xaxis.set_major_locator(MaxNLocator(integer=True))
+    ax.set_xlabel('Hits Taken During Cast')
+    ax.set_ylabel('Success Rate')
+    ax.set_title(title)
+    ax.grid(True, linestyle=':', alpha=0.7)
+    ax.legend(loc='upper right')
+    fig.tight_layout()
+    fig.savefig(output_file, dpi=dpi)
+    plt.close(fig)
+
+def render_all(stats, output_dir, prefix='calibration_comparison', title_suffix=''):
+    """Writes the full set of plots for one set of aggregates. Cost depends only on the number of bins."""
+    title = 'Reliability Diagram: Channeling Model Comparison' + title_suffix
+    os.makedirs(output_dir, exist_ok=True)
+    outputs = {
+        'reliability': os.path.join(output_dir, f"{prefix}.png"),
+        'reliability_sm': os.path.join(output_dir, f"{prefix}_sm.png"),
+        'error': os.path.join(output_dir, f"{prefix}_error.png"),
+        'hits': os.path.join(output_dir, f"{prefix}_hits.png"),
+    }
+    plot_reliability(stats, outputs['reliability'], title)
+    plot_reliability(stats, outputs['reliability_sm'], title, dpi=100)
+    plot_reliability_error(stats, outputs['error'], title)
+    plot_by_hits(stats, outputs['hits'], 'Success Rate by Hits Taken' + title_suffix)
+    return outputs
+
+def render_slice(source, slice_name, filters, output_dir):
+    """Aggregates and renders one slice of the data. Runs in a worker process for batch rendering."""
+    stats = model_compare.aggregate_models(source, **filters)
+    if stats['total_events'] == 0:
+        return slice_name, stats['total_events'], None
+    prefix = 'calibration_' + ''.join(c if c.isalnum() else '_' for c in slice_name).strip('_').lower()
+    outputs = render_all(stats, output_dir, prefix=prefix, title_suffix=f" ({slice_name})")
+    return slice_name, stats['total_events'], outputs
+
+def render_slices(source, slices, output_dir, workers=None):
+    """
+    Renders many slices in parallel. slices maps a slice name to event_store
+    filters, e.g. {'Druid Gate': {'char_class': 'Druid', 'spell': 'Gate'}}.
+    Each worker pushes its own filters down to the store, so only aggregates
+    (never raw rows) cross process boundaries.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(render_slice, source, name, filters, output_dir) for name, filters in slices.items()]
+        for future in futures:
+            slice_name, total_events, outputs = future.result()
+            if outputs is None:
+                print(f"  [!] {slice_name}: no events, skipped")
+            else:
+                print(f"  [+] {slice_name}: {total_events} events -> {outputs['reliability']}")
+
+def distinct_values(db_path, column):
+    """Values of a store column to slice by (class or spell)."""
+    conn = sqlite3.connect(db_path)
+    try:
+        return [row[0] for row in conn.execute(f"SELECT DISTINCT {column} FROM events ORDER BY {column}")]
+    finally:
+        conn.close()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Render channeling model calibration plots from binned aggregates.")
+    parser.add_argument('source', nargs='?', default="channeling_data_cleaned.csv",
+                        help="Cleaned channeling CSV or SQLite event store (.db)")
+    parser.add_argument('--output-dir', default=".", help="Directory to write the PNG files to")
+    parser.add_argument('--slice-by', choices=['class', 'spell'],
+                        help="Also render one set of plots per class or spell (requires an event store)")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes for slice rendering")
+    args = parser.parse_args()
+    if args.slice_by and not event_store.is_store_path(args.source):
+        parser.error("--slice-by requires an SQLite event store source")
+
+    print(f"Reading data from {args.source}...")
+    try:
+        stats = model_compare.aggregate_models(args.source)
+    except FileNotFoundError:
+        print(f"Error: Could not find the file {args.source}")
+        sys.exit(1)
+
+    if stats['total_events'] == 0:
+        print("No valid data found to process.")
+    else:
+        for path in render_all(stats, args.output_dir).values():
+            print(f"Saved {path}")
+
+    if args.slice_by:
+        filter_key = 'char_class' if args.slice_by == 'class' else 'spell'
+        values = distinct_values(args.source, args.slice_by)
+        print(f"\nRendering {len(values)} slices by {args.slice_by}...")
+        render_slices(args.source, {value: {filter_key: value} for value in values},
+                      os.path.join(args.output_dir, f"by_{args.slice_by}"), args.workers)
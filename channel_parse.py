@@ -1,58 +1,69 @@
+import argparse
 import os
 import re
 from collections import Counter
-from pathlib import Path
+
+import log_fingerprint
+
+# Regex to strip the EQ timestamp [Day Mon DD HH:MM:SS YYYY] and grab the message
+LOG_PATTERN = re.compile(r'^\[.*?\]\s+(.*)')
+
+# Regex to match the physical damage pattern: "<NPC> <attack> YOU for <damage> points of damage."
+#ATTACK_PATTERN = re.compile(r' YOU for \d+ points of damage\.')
+ATTACK_PATTERN = re.compile(r'(?: YOU for \d+ points of damage|You have been \w+)\.')
+
+def is_cast_start(line):
+    """True if a raw log line starts a new cast, i.e. a point where the parser state fully resets."""
+    match = LOG_PATTERN.match(line)
+    return bool(match) and match.group(1).strip().startswith("You begin casting ")
+
+def tally_casts(lines, success_tally, failure_tally):
+    """Runs the casting state machine over the lines of one log, adding resolved casts to the tallies."""
+    is_casting = False
+    current_hits = 0
+
+    for line in lines:
+        match = LOG_PATTERN.match(line)
+        if not match:
+            continue
+        
+        # Extract the log message, stripping trailing spaces/newlines
+        message = match.group(1).strip()
+
+        # 1. Check if a new cast is starting
+        if message.startswith("You begin casting "):
+            is_casting = True
+            current_hits = 0
+            
+        # 2. If we are currently casting, check for hits, successes, or failures
+        elif is_casting:
+            # Count the hit if it matches the damage pattern
+            if ATTACK_PATTERN.search(message):
+                current_hits += 1
+                
+            # Resolve cast: Success (channel check passed)
+            elif message.startswith("You regain your concentration"):
+                if current_hits > 0:
+                    success_tally[current_hits] += 1
+                is_casting = False # Reset state
+                
+            # Resolve cast: Failure (interrupted)
+            elif message.startswith("Your spell is interrupted."):
+                if current_hits > 0:
+                    failure_tally[current_hits] += 1
+                is_casting = False # Reset state
 
 def analyze_eq_casting_logs(directory_path):
     # Counters to tally the frequency of X hits during a success/failure
     success_tally = Counter()
     failure_tally = Counter()
 
-    # Regex to strip the EQ timestamp [Day Mon DD HH:MM:SS YYYY] and grab the message
-    log_pattern = re.compile(r'^\[.*?\]\s+(.*)')
-    
-    # Regex to match the physical damage pattern: "<NPC> <attack> YOU for <damage> points of damage."
-    #attack_pattern = re.compile(r' YOU for \d+ points of damage\.')
-    attack_pattern = re.compile(r'(?: YOU for \d+ points of damage|You have been \w+)\.')
-
-    # Iterate through all .txt files in the target directory
+    # Iterate through all .txt files in the target directory, skipping copies of logs already covered
     # (EverQuest logs are typically formatted as eqlog_Character_server.txt)
-    for file_path in Path(directory_path).glob('*.txt'):
+    for file_path in log_fingerprint.unique_log_files(directory_path):
         try:
             with open(file_path, 'r', encoding='utf-8', errors='ignore') as file:
-                is_casting = False
-                current_hits = 0
-
-                for line in file:
-                    match = log_pattern.match(line)
-                    if not match:
-                        continue
-                    
-                    # Extract the log message, stripping trailing spaces/newlines
-                    message = match.group(1).strip()
-
-                    # 1. Check if a new cast is starting
-                    if message.startswith("You begin casting "):
-                        is_casting = True
-                        current_hits = 0
-                        
-                    # 2. If we are currently casting, check for hits, successes, or failures
-                    elif is_casting:
-                        # Count the hit if it matches the damage pattern
-                        if attack_pattern.search(message):
-                            current_hits += 1
-                            
-                        # Resolve cast: Success (channel check passed)
-                        elif message.startswith("You regain your concentration"):
-                            if current_hits > 0:
-                                success_tally[current_hits] += 1
-                            is_casting = False # Reset state
-                            
-                        # Resolve cast: Failure (interrupted)
-                        elif message.startswith("Your spell is interrupted."):
-                            if current_hits > 0:
-                                failure_tally[current_hits] += 1
-                            is_casting = False # Reset state
+                tally_casts(file, success_tally, failure_tally)
                             
         except Exception as e:
             print(f"Error reading {file_path}: {e}")
@@ -83,11 +94,20 @@ def print_report(success_tally, failure_tally):
 
 
 if __name__ == "__main__":
+    import sample_report
+
+    parser = argparse.ArgumentParser(description="Tally channeling successes and failures by hits taken.")
+    parser.add_argument('--sample', type=float, nargs='?', const=sample_report.DEFAULT_RATE_PRECISION, metavar='PRECISION',
+                        help="Quick look: parse random log chunks until the success rate is within +/- PRECISION (95%% CI)")
+    args = parser.parse_args()
+
     # Point this to your EverQuest logs directory
     LOG_DIR = "../eqlogs/harcourt_applets/DSR/" 
     
     if not os.path.exists(LOG_DIR):
         print(f"Directory not found: {LOG_DIR}. Please update the LOG_DIR variable.")
+    elif args.sample is not None:
+        sample_report.print_sample_report(sample_report.sample_tallies(LOG_DIR, args.sample))
     else:
         successes, failures = analyze_eq_casting_logs(LOG_DIR)
         print_report(successes, failures)
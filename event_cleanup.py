@@ -1,5 +1,6 @@
 import csv
 import re
+import sqlite3
 import urllib.request
 import urllib.parse
 from time import sleep
@@ -144,6 +145,35 @@ def clean_csv(input_file, output_file):
 
     print(f"\nCleanup complete. Data saved to: {output_file}")
 
+def clean_store(db_path):
+    """Applies the same class normalization and level gap rule as clean_csv to an SQLite event store, in place."""
+    print(f"Cleaning event store {db_path}...")
+    
+    conn = sqlite3.connect(db_path)
+    try:
+        # Each distinct (class, spell, level) only needs its level gap computed once
+        groups = conn.execute("SELECT DISTINCT class, spell, level FROM events").fetchall()
+        
+        with conn:
+            for char_class, spell, char_level in groups:
+                base_class = get_base_class(char_class)
+                spell_level = fetch_spell_level(spell, base_class)
+                
+                level_diff = 0
+                if spell_level is not None:
+                    diff = char_level - spell_level
+                    if diff > 6:
+                        level_diff = diff
+                
+                conn.execute(
+                    "UPDATE events SET class = ?, level_gap = ? WHERE class = ? AND spell = ? AND level = ?",
+                    (base_class, level_diff, char_class, spell, char_level),
+                )
+    finally:
+        conn.close()
+
+    print(f"\nCleanup complete. Event store updated: {db_path}")
+
 if __name__ == "__main__":
     INPUT_CSV = "channeling_data.csv"
     OUTPUT_CSV = "channeling_data_cleaned.csv"
@@ -1,11 +1,40 @@
 import os
 import re
 import csv
-from pathlib import Path
+from datetime import datetime
 
-def analyze_eq_casting_logs(directory_path, output_csv):
-    # Core regex patterns for message parsing
-    log_pattern = re.compile(r'^\[.*?\]\s+(.*)')
+import event_store
+import log_fingerprint
+
+# EQ log timestamp format, e.g. [Mon Feb 09 20:11:12 2026]
+EQ_TIME_FORMAT = '%a %b %d %H:%M:%S %Y'
+
+def parse_timestamp(stamp):
+    """Converts an EQ log timestamp to ISO 8601 so it sorts correctly in the event store."""
+    try:
+        return datetime.strptime(stamp, EQ_TIME_FORMAT).isoformat(sep=' ')
+    except ValueError:
+        return stamp
+
+def character_name(filename):
+    """
+    Character name from a log filename, e.g. 'Bob' from eqlog_Bob_P1999Green.txt. The
+    eqlog_<Name>_ part is preferred so renamed copies ('Copy of eqlog_Bob_...') still work.
+    """
+    match = re.search(r'eqlog_([A-Za-z]+)_', filename, re.IGNORECASE)
+    if match:
+        return match.group(1)
+
+    # Otherwise, the first string of letters excluding 'eqlog' and 'txt'
+    letter_blocks = re.findall(r'[A-Za-z]+', filename)
+    valid_names = [b for b in letter_blocks if b.lower() not in ('eqlog', 'txt')]
+    return valid_names[0] if valid_names else None
+
+def analyze_eq_casting_logs(directory_path, output_csv, db_path=None):
+    # output_csv and db_path are both optional outputs; pass None to skip either one
+
+    # Core regex patterns for message parsing (group 1 is the timestamp, group 2 the message)
+    log_pattern = re.compile(r'^\[(.*?)\]\s+(.*)')
     attack_pattern = re.compile(r'(?: YOU for \d+ points of damage|You have been \w+)\.')
     
     # State-tracking regex patterns
@@ -19,22 +48,22 @@ def analyze_eq_casting_logs(directory_path, output_csv):
         return
 
     # Open CSV for writing
-    with open(output_csv, 'w', newline='', encoding='utf-8') as csvfile:
-        writer = csv.writer(csvfile)
-        
-        # Write the header
-        writer.writerow(['channeling skill', 'level', 'class', 'spell', 'hits', 'result'])
+    csvfile = open(output_csv, 'w', newline='', encoding='utf-8') if output_csv else None
+    writer = csv.writer(csvfile) if csvfile else None
+    conn = event_store.create_store(db_path) if db_path else None
+    pending = []
+
+    try:
+        if writer:
+            # Write the header
+            writer.writerow(['channeling skill', 'level', 'class', 'spell', 'hits', 'result'])
         
-        for file_path in Path(directory_path).glob('*.txt'):
+        for file_path in log_fingerprint.unique_log_files(directory_path):
             filename = file_path.name
             
-            # Extract character name: a string of letters excluding 'eqlog' and 'txt'
-            letter_blocks = re.findall(r'[A-Za-z]+', filename)
-            valid_names = [b for b in letter_blocks if b.lower() not in ('eqlog', 'txt')]
-            
-            if not valid_names:
+            char_name = character_name(filename)
+            if not char_name:
                 continue
-            char_name = valid_names[0]
             
             # Who message pattern for the specific character (captures Level and Class)
             # e.g., "[50 Cleric] CharacterName"
@@ -52,7 +81,7 @@ def analyze_eq_casting_logs(directory_path, output_csv):
                         if not match:
                             continue
 
-                        message = match.group(1).strip()
+                        message = match.group(2).strip()
 
                         if initial_skill is None:
                             s_match = skill_pattern.match(message)
@@ -89,8 +118,9 @@ def analyze_eq_casting_logs(directory_path, output_csv):
                 continue
                 
             # Pass 2: Parse events sequentially and record channeling checks
+            # Read as bytes so each cast can be recorded with its byte offset in the file
             try:
-                with open(file_path, 'r', encoding='utf-8', errors='ignore') as file:
+                with open(file_path, 'rb') as file:
                     current_skill = initial_skill
                     current_level = initial_level
                     
@@ -98,13 +128,20 @@ def analyze_eq_casting_logs(directory_path, output_csv):
                     current_hits = 0
                     current_spell = ""
                     is_stunned = False
+                    cast_offset = 0
+                    cast_time = None
+                    offset = 0
                     
-                    for line in file:
+                    for raw_line in file:
+                        line_offset = offset
+                        offset += len(raw_line)
+
+                        line = raw_line.decode('utf-8', errors='ignore')
                         match = log_pattern.match(line)
                         if not match:
                             continue
                         
-                        message = match.group(1).strip()
+                        message = match.group(2).strip()
                         
                         # 1. Check for state updates
                         s_match = skill_pattern.match(message)
@@ -124,6 +161,8 @@ def analyze_eq_casting_logs(directory_path, output_csv):
                             current_hits = 0
                             is_stunned = False
                             current_spell = spell_match.group(1)
+                            cast_offset = line_offset
+                            cast_time = match.group(1)
                             continue
                             
                         # 3. Handle casting events, stuns, and resolution
@@ -136,23 +175,46 @@ def analyze_eq_casting_logs(directory_path, output_csv):
                                 
                             elif message.startswith("You regain your concentration"):
                                 if current_hits > 0 :
-                                    writer.writerow([current_skill, current_level, char_class, current_spell, current_hits, 'Success'])
+                                    if writer:
+                                        writer.writerow([current_skill, current_level, char_class, current_spell, current_hits, 'Success'])
+                                    if conn:
+                                        pending.append((filename, cast_offset, parse_timestamp(cast_time), current_spell, char_class,
+                                                        current_skill, current_level, current_hits, int(is_stunned), 'Success'))
                                 is_casting = False # Reset state
                                 
                             elif message.startswith("Your spell is interrupted."):
-                                if current_hits > 0 and not is_stunned:
+                                if current_hits > 0 and not is_stunned and writer:
                                     writer.writerow([current_skill, current_level, char_class, current_spell, current_hits, 'Failure'])
+                                # Stunned interrupts are kept in the store (flagged) and filtered out at query time
+                                if current_hits > 0 and conn:
+                                    pending.append((filename, cast_offset, parse_timestamp(cast_time), current_spell, char_class,
+                                                    current_skill, current_level, current_hits, int(is_stunned), 'Failure'))
                                 is_casting = False # Reset state
 
+                            if conn and len(pending) >= event_store.BATCH_SIZE:
+                                event_store.write_events(conn, pending)
+
             except Exception as e:
                 print(f"Error reading {file_path} during parsing pass: {e}")
 
-    print(f"\nProcessing complete. Log data compiled into: {output_csv}")
+        if conn:
+            event_store.write_events(conn, pending)
+
+    finally:
+        if csvfile:
+            csvfile.close()
+        if conn:
+            conn.close()
+
+    outputs = [path for path in (output_csv, db_path) if path]
+    print(f"\nProcessing complete. Log data compiled into: {', '.join(outputs)}")
 
 
 if __name__ == "__main__":
     # Point this to your EverQuest logs directory
     LOG_DIR = "../eqlogs/harcourt_applets/DSR/" 
     OUTPUT_FILE = "channeling_data.csv"
+    # Set to e.g. "channeling.db" to also build the indexed SQLite event store
+    OUTPUT_DB = None
     
-    analyze_eq_casting_logs(LOG_DIR, OUTPUT_FILE)
+    analyze_eq_casting_logs(LOG_DIR, OUTPUT_FILE, OUTPUT_DB)
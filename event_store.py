@@ -0,0 +1,153 @@
+import csv
+import os
+import sqlite3
+from contextlib import contextmanager
+
+# Number of events buffered before they are flushed in a single transaction
+BATCH_SIZE = 5000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    file TEXT NOT NULL,
+    byte_offset INTEGER NOT NULL,
+    timestamp TEXT,
+    spell TEXT NOT NULL,
+    class TEXT NOT NULL,
+    skill INTEGER NOT NULL,
+    level INTEGER NOT NULL,
+    hits INTEGER NOT NULL,
+    stunned INTEGER NOT NULL DEFAULT 0,
+    result TEXT NOT NULL,
+    level_gap INTEGER NOT NULL DEFAULT 0
+);
+-- A single query seeks on at most one index, so each common filter combination needs an
+-- index that leads with its first column: "class + spell + skill range", "spell (+ skill
+-- range)" for --slice-by spell, a bare skill range, and a time window. Low-selectivity
+-- columns (result, hits) are not indexed.
+CREATE INDEX IF NOT EXISTS idx_events_class_spell_skill ON events (class, spell, skill);
+CREATE INDEX IF NOT EXISTS idx_events_spell_skill ON events (spell, skill);
+CREATE INDEX IF NOT EXISTS idx_events_skill ON events (skill);
+CREATE INDEX IF NOT EXISTS idx_events_timestamp ON events (timestamp);
+CREATE INDEX IF NOT EXISTS idx_events_file ON events (file, byte_offset);
+-- Single-column indexes from earlier versions of the schema, covered by the ones above
+DROP INDEX IF EXISTS idx_events_spell;
+DROP INDEX IF EXISTS idx_events_class;
+DROP INDEX IF EXISTS idx_events_level;
+DROP INDEX IF EXISTS idx_events_hits;
+DROP INDEX IF EXISTS idx_events_result;
+"""
+
+INSERT_SQL = """
+INSERT INTO events (file, byte_offset, timestamp, spell, class, skill, level, hits, stunned, result)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Maps query keyword arguments to the SQL fragment they push down into the WHERE clause
+FILTERS = {
+    'file': 'file = ?',
+    'spell': 'spell = ?',
+    'char_class': 'class = ?',
+    'result': 'result = ?',
+    'min_skill': 'skill >= ?',
+    'max_skill': 'skill <= ?',
+    'min_level': 'level >= ?',
+    'max_level': 'level <= ?',
+    'min_hits': 'hits >= ?',
+    'max_hits': 'hits <= ?',
+    'since': 'timestamp >= ?',
+    'until': 'timestamp < ?',
+}
+
+def is_store_path(path):
+    """True if the path looks like an SQLite event store rather than a CSV file."""
+    return str(path).lower().endswith(('.db', '.sqlite', '.sqlite3'))
+
+def create_store(db_path):
+    """
+    Opens the event store and clears any events from a previous run,
+    mirroring how event_parse overwrites channeling_data.csv.
+    """
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SCHEMA)
+    conn.execute("DELETE FROM events")
+    conn.commit()
+    return conn
+
+def write_events(conn, events):
+    """Inserts a batch of event tuples (in INSERT_SQL column order) in one transaction and empties the batch."""
+    if not events:
+        return
+    with conn:
+        conn.executemany(INSERT_SQL, events)
+    events.clear()
+
+def query_events(db_path, include_stunned=False, **filters):
+    """
+    Yields events as dicts, with every filter evaluated by SQLite so only the
+    matching rows are read. Interrupts while stunned are excluded by default,
+    matching the rows event_parse writes to the CSV.
+
+    e.g. query_events('channeling.db', spell='Gate', char_class='Druid', min_skill=151, result='Failure')
+    """
+    clauses = []
+    params = []
+    for key, value in filters.items():
+        if value is None:
+            continue
+        if key not in FILTERS:
+            raise ValueError(f"Unknown event filter: {key}")
+        clauses.append(FILTERS[key])
+        params.append(value)
+
+    if not include_stunned:
+        clauses.append("NOT (stunned = 1 AND result = 'Failure')")
+
+    sql = "SELECT * FROM events"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    sql += " ORDER BY id"
+
+    # sqlite3.connect would silently create an empty database for a mistyped path
+    if not os.path.exists(db_path):
+        raise FileNotFoundError(db_path)
+
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    try:
+        for row in conn.execute(sql, params):
+            yield dict(row)
+    finally:
+        conn.close()
+
+def iter_csv_rows(db_path, **filters):
+    """
+    Yields store events keyed like channeling_data_cleaned.csv rows, so the
+    model scripts can read from the store in place of csv.DictReader.
+    """
+    for event in query_events(db_path, **filters):
+        yield {
+            'channeling skill': str(event['skill']),
+            'level': str(event['level']),
+            'class': event['class'],
+            'spell': event['spell'],
+            'hits': str(event['hits']),
+            'result': event['result'],
+            'level gap': str(event['level_gap']),
+        }
+
+@contextmanager
+def read_rows(path, **filters):
+    """
+    Opens either a channeling CSV or an SQLite event store and yields an iterable
+    of CSV-style row dicts. Filters are pushed down into SQL and need a store.
+    """
+    if is_store_path(path):
+        yield iter_csv_rows(path, **filters)
+        return
+
+    if any(value is not None for value in filters.values()):
+        raise ValueError(f"Event filters need an SQLite event store, not {path}")
+
+    with open(path, 'r', encoding='utf-8') as f:
+        yield csv.DictReader(f)
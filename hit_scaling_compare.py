@@ -1,4 +1,4 @@
-import csv
+import event_store
 from collections import defaultdict
 
 def calc_azxten(skill, level, level_gap, hits):
@@ -13,13 +13,12 @@ def calc_eqemu(skill, hits):
     chance = (30 + (skill / 400.0 * 100) - (hits * 2)) / 100.0
     return max(0.0, min(1.0, chance))
 
-def analyze_by_hits(csv_file):
+def analyze_by_hits(csv_file, **filters):
     # hit_data[num_hits] = { 'successes': 0, 'total': 0, 'pred_azxten_sum': 0.0, 'pred_eqemu_sum': 0.0 }
     hit_data = defaultdict(lambda: {'successes': 0, 'total': 0, 'az_sum': 0.0, 'eq_sum': 0.0})
 
     try:
-        with open(csv_file, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
+        with event_store.read_rows(csv_file, **filters) as reader:
             for row in reader:
                 try:
                     skill = int(row['channeling skill'])
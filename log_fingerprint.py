@@ -0,0 +1,179 @@
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+
+# Manifest of fingerprints kept in the log directory, so unchanged logs are never re-hashed
+MANIFEST_NAME = '.eqlog_fingerprints.json'
+
+# Names EverQuest itself writes (eqlog_Character_server.txt). Among identical copies these are
+# kept over backups like 'Copy of eqlog_...', since event_parse reads the character from the name.
+CANONICAL_NAME_PATTERN = re.compile(r'^eqlog_[A-Za-z]+_[A-Za-z0-9]+\.txt$', re.IGNORECASE)
+
+# Sampled blocks sit at fixed absolute offsets (0, 64K, 256K, 1M, ...), not offsets relative
+# to the file size. A log that is a prefix of another then has identical blocks at every offset
+# it covers, so both exact copies and rotated/truncated copies can be matched from the manifest.
+BLOCK_SIZE = 4096
+FIRST_SAMPLE_OFFSET = 64 * 1024
+SAMPLE_GROWTH = 4
+
+READ_SIZE = 1024 * 1024
+
+def sample_offsets(size):
+    """Offsets of every sample block that fits entirely inside a file of this size."""
+    offsets = []
+    offset = 0
+    while offset + BLOCK_SIZE <= size:
+        offsets.append(offset)
+        offset = FIRST_SAMPLE_OFFSET if offset == 0 else offset * SAMPLE_GROWTH
+    return offsets
+
+def hash_range(path, length):
+    """SHA-1 of the first `length` bytes of a file."""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        remaining = length
+        while remaining > 0:
+            chunk = f.read(min(READ_SIZE, remaining))
+            if not chunk:
+                break
+            digest.update(chunk)
+            remaining -= len(chunk)
+    return digest.hexdigest()
+
+def fingerprint_file(path):
+    """Cheap fingerprint: size, mtime, and hashes of the sampled blocks. The full hash is filled in lazily."""
+    stat = os.stat(path)
+    blocks = {}
+    with open(path, 'rb') as f:
+        for offset in sample_offsets(stat.st_size):
+            f.seek(offset)
+            blocks[str(offset)] = hashlib.sha1(f.read(BLOCK_SIZE)).hexdigest()
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'blocks': blocks, 'sha1': None}
+
+def load_manifest(manifest_path):
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        return manifest if isinstance(manifest, dict) else {}
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+def save_manifest(manifest_path, manifest):
+    # The manifest is only a cache; a read-only log directory must not stop the parse
+    try:
+        with open(manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+    except OSError as e:
+        print(f"Could not save fingerprint manifest {manifest_path}: {e}")
+
+def is_current(cached, stat):
+    """True if a manifest entry is complete and was taken from a file of this size and mtime."""
+    if not isinstance(cached, dict) or not isinstance(cached.get('blocks'), dict):
+        return False
+    cached.setdefault('sha1', None)
+    return cached.get('size') == stat.st_size and cached.get('mtime_ns') == stat.st_mtime_ns
+
+def update_fingerprints(directory_path, manifest_path=None):
+    """Returns {filename: fingerprint} for every log, re-hashing only files whose size or mtime changed."""
+    manifest_path = manifest_path or os.path.join(directory_path, MANIFEST_NAME)
+    manifest = load_manifest(manifest_path)
+
+    fingerprints = {}
+    for file_path in Path(directory_path).glob('*.txt'):
+        # A dangling link or unreadable file is left out of dedup, but unique_log_files still returns it
+        try:
+            stat = os.stat(file_path)
+            cached = manifest.get(file_path.name)
+            if is_current(cached, stat):
+                fingerprints[file_path.name] = cached
+            else:
+                fingerprints[file_path.name] = fingerprint_file(file_path)
+        except OSError as e:
+            print(f"Error reading {file_path}: {e}")
+
+    return fingerprints, manifest_path
+
+def is_prefix_of(directory_path, short_name, short, long_name, long):
+    """True if the file `short` is byte-for-byte the start of `long` (or identical to it)."""
+    if short['size'] > long['size']:
+        return False
+
+    # Every block the shorter file contains must match the longer file at the same offset
+    for offset, digest in short['blocks'].items():
+        if long['blocks'].get(offset) != digest:
+            return False
+
+    # Confirm with a hash of the whole shorter file against the same range of the longer one
+    if short['sha1'] is None:
+        short['sha1'] = hash_range(os.path.join(directory_path, short_name), short['size'])
+    if short['size'] == long['size']:
+        if long['sha1'] is None:
+            long['sha1'] = hash_range(os.path.join(directory_path, long_name), long['size'])
+        return short['sha1'] == long['sha1']
+    return short['sha1'] == hash_range(os.path.join(directory_path, long_name), short['size'])
+
+def find_redundant_logs(directory_path, manifest_path=None):
+    """
+    Finds logs whose bytes are fully contained in another log in the same directory:
+    exact duplicates (backups, copies merged from another machine) and prefixes of a
+    longer log (older rotated or copied snapshots that kept growing).
+
+    Returns {redundant filename: (covering filename, 'duplicate' or 'prefix')}.
+    Only the longest log in each chain is kept; exact duplicates keep a canonical
+    eqlog_Character_server.txt name when there is one, otherwise the first name.
+    """
+    fingerprints, manifest_path = update_fingerprints(directory_path, manifest_path)
+
+    # Longest first, so each file is only compared against logs that could contain it
+    ordered = sorted(fingerprints, key=lambda name: (-fingerprints[name]['size'],
+                                                     not CANONICAL_NAME_PATTERN.match(name), name))
+    redundant = {}
+
+    for i, name in enumerate(ordered):
+        if fingerprints[name]['size'] == 0:
+            continue
+        for covering in ordered[:i]:
+            if covering in redundant:
+                # A redundant log's bytes are also in whatever covers it
+                continue
+            try:
+                contained = is_prefix_of(directory_path, name, fingerprints[name], covering, fingerprints[covering])
+            except OSError as e:
+                # Could not confirm with the full hash, so both files are kept
+                print(f"Error reading {name} or {covering}: {e}")
+                contained = False
+            if contained:
+                kind = 'duplicate' if fingerprints[name]['size'] == fingerprints[covering]['size'] else 'prefix'
+                redundant[name] = (covering, kind)
+                break
+
+    save_manifest(manifest_path, fingerprints)
+    return redundant
+
+def unique_log_files(directory_path, manifest_path=None):
+    """
+    Drop-in replacement for Path(directory_path).glob('*.txt') that skips logs whose
+    contents are already covered by another log, so no cast is parsed or counted twice.
+    """
+    redundant = find_redundant_logs(directory_path, manifest_path)
+    for name, (covering, kind) in sorted(redundant.items()):
+        description = "duplicate of" if kind == 'duplicate' else "contained in"
+        print(f"Skipping {name}: {description} {covering}")
+
+    return [file_path for file_path in Path(directory_path).glob('*.txt') if file_path.name not in redundant]
+
+if __name__ == "__main__":
+    LOG_DIR = "../eqlogs/harcourt_applets/DSR/"
+
+    if not os.path.exists(LOG_DIR):
+        print(f"Directory not found: {LOG_DIR}. Please update the LOG_DIR variable.")
+    else:
+        redundant = find_redundant_logs(LOG_DIR)
+        print("=== Redundant Log Report ===")
+        print(f"{'Filename':<40} | {'Kind':<10} | {'Covered By'}")
+        print("-" * 80)
+        for name, (covering, kind) in sorted(redundant.items()):
+            print(f"{name:<40} | {kind:<10} | {covering}")
+        print(f"\n{len(redundant)} redundant logs found.")
@@ -1,7 +1,8 @@
 import os
 import re
 from collections import defaultdict
-from pathlib import Path
+
+import log_fingerprint
 
 def find_max_hits_on_success(directory_path):
     # Maps hit count to a list of (filename, line_number) tuples
@@ -10,7 +11,7 @@ def find_max_hits_on_success(directory_path):
     log_pattern = re.compile(r'^\[.*?\]\s+(.*)')
     attack_pattern = re.compile(r' YOU for \d+ points of damage\.')
     
-    for file_path in Path(directory_path).glob('*.txt'):
+    for file_path in log_fingerprint.unique_log_files(directory_path):
         try:
             with open(file_path, 'r', encoding='utf-8', errors='ignore') as file:
                 is_casting = False
@@ -1,4 +1,6 @@
-import csv
+import argparse
+
+import event_store
 
 def calc_azxten(skill, level, level_gap, hits):
     """
@@ -34,104 +36,129 @@ def print_calibration_table(bins, model_name):
             exp_pct = (data['expected'] / data['count']) * 100
             print(f"~ {b:<8.2f} | {data['count']:<8} | {act_pct:>8.2f}% | {exp_pct:>8.2f}%")
 
-def compare_models(csv_file):
-    total_events = 0
-    actual_successes = 0
-    
-    # Tracking for Model A (Azxten)
-    exp_successes_a = 0.0
-    brier_sum_a = 0.0
-    bins_a = {}
-    
-    # Tracking for Model B (EQEmu)
-    exp_successes_b = 0.0
-    brier_sum_b = 0.0
-    bins_b = {}
+# Every model evaluated by the comparison, in report order (Model A, Model B, ...).
+# Each takes (skill, level, level_gap, hits) and returns the predicted success chance.
+MODELS = {
+    'Azxten': lambda skill, level, level_gap, hits: calc_azxten(skill, level, level_gap, hits),
+    'EQEmu': lambda skill, level, level_gap, hits: calc_eqemu(skill, hits),
+}
+
+def model_label(index, name):
+    """Display label used in reports and plots, e.g. 'Model A: Azxten'."""
+    return f"Model {chr(ord('A') + index)}: {name}"
+
+def add_to_bins(bins, prob, actual_outcome):
+    """Adds one event to a calibration bin dict (rounded to the nearest 10%)."""
+    bin_key = round(prob * 10) / 10.0
+    if bin_key not in bins:
+        bins[bin_key] = {'actual': 0, 'expected': 0.0, 'count': 0}
+    bins[bin_key]['actual'] += actual_outcome
+    bins[bin_key]['expected'] += prob
+    bins[bin_key]['count'] += 1
+
+def aggregate_rows(rows):
+    """
+    Reduces CSV-style row dicts to fixed-size aggregates in a single pass: per-model
+    expected successes, Brier sums and calibration bins, plus per-hits sums.
+    The report, the calibration plots and the sampled estimates are all built from these.
+    """
+    stats = {
+        'total_events': 0,
+        'actual_successes': 0,
+        'models': {name: {'expected': 0.0, 'brier_sum': 0.0, 'bins': {}} for name in MODELS},
+        # hits[num_hits] = {'successes': 0, 'total': 0, 'predicted': {model_name: sum of predictions}}
+        'hits': {},
+    }
+
+    for row in rows:
+        try:
+            # Map CSV columns to variables
+            skill = int(row['channeling skill'])
+            level = int(row['level'])
+            hits = int(row['hits'])
+            level_gap_str = row.get('level gap', '0')
+            level_gap = int(level_gap_str) if level_gap_str.strip() else 0
+            result = row['result'].strip().lower()
+        except (ValueError, KeyError, AttributeError):
+            # Skip malformed rows
+            continue
+            
+        actual_outcome = 1 if result == 'success' else 0
+        stats['total_events'] += 1
+        stats['actual_successes'] += actual_outcome
+
+        if hits not in stats['hits']:
+            stats['hits'][hits] = {'successes': 0, 'total': 0, 'predicted': {name: 0.0 for name in MODELS}}
+        hit_stats = stats['hits'][hits]
+        hit_stats['successes'] += actual_outcome
+        hit_stats['total'] += 1
+        
+        for name, model in MODELS.items():
+            prob = model(skill, level, level_gap, hits)
+            model_stats = stats['models'][name]
+            model_stats['expected'] += prob
+            model_stats['brier_sum'] += (prob - actual_outcome) ** 2
+            add_to_bins(model_stats['bins'], prob, actual_outcome)
+            hit_stats['predicted'][name] += prob
+
+    return stats
 
+def aggregate_models(csv_file, **filters):
+    """Aggregates every event in a CSV or event store (see aggregate_rows)."""
+    with event_store.read_rows(csv_file, **filters) as reader:
+        return aggregate_rows(reader)
+
+def compare_models(csv_file, **filters):
+    # csv_file may also be an SQLite event store (.db); filters are pushed down to the database
     print(f"Reading data from {csv_file}...\n")
     
     try:
-        with open(csv_file, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            
-            for row in reader:
-                try:
-                    # Map CSV columns to variables
-                    skill = int(row['channeling skill'])
-                    level = int(row['level'])
-                    hits = int(row['hits'])
-                    level_gap_str = row.get('level gap', '0')
-                    level_gap = int(level_gap_str) if level_gap_str.strip() else 0
-                    result = row['result'].strip().lower()
-                except (ValueError, KeyError):
-                    # Skip malformed rows
-                    continue
-                    
-                actual_outcome = 1 if result == 'success' else 0
-                total_events += 1
-                actual_successes += actual_outcome
-                
-                # --- Process Model A (Azxten) ---
-                prob_a = calc_azxten(skill, level, level_gap, hits)
-                exp_successes_a += prob_a
-                brier_sum_a += (prob_a - actual_outcome) ** 2
-                
-                bin_key_a = round(prob_a * 10) / 10.0
-                if bin_key_a not in bins_a:
-                    bins_a[bin_key_a] = {'actual': 0, 'expected': 0.0, 'count': 0}
-                bins_a[bin_key_a]['actual'] += actual_outcome
-                bins_a[bin_key_a]['expected'] += prob_a
-                bins_a[bin_key_a]['count'] += 1
-                
-                # --- Process Model B (EQEmu) ---
-                prob_b = calc_eqemu(skill, hits)
-                exp_successes_b += prob_b
-                brier_sum_b += (prob_b - actual_outcome) ** 2
-                
-                bin_key_b = round(prob_b * 10) / 10.0
-                if bin_key_b not in bins_b:
-                    bins_b[bin_key_b] = {'actual': 0, 'expected': 0.0, 'count': 0}
-                bins_b[bin_key_b]['actual'] += actual_outcome
-                bins_b[bin_key_b]['expected'] += prob_b
-                bins_b[bin_key_b]['count'] += 1
-                
+        stats = aggregate_models(csv_file, **filters)
     except FileNotFoundError:
         print(f"Error: Could not find the file {csv_file}")
         return
 
+    total_events = stats['total_events']
+    actual_successes = stats['actual_successes']
+
     if total_events == 0:
         print("No valid data found to process.")
         return
 
     # Metrics Calculations
     actual_rate = (actual_successes / total_events) * 100
-    
-    # Model A Stats
-    brier_a = brier_sum_a / total_events
-    exp_rate_a = (exp_successes_a / total_events) * 100
-    
-    # Model B Stats
-    brier_b = brier_sum_b / total_events
-    exp_rate_b = (exp_successes_b / total_events) * 100
 
     # Print Final Report
     print(f"Total Events Evaluated:  {total_events}")
     print(f"Actual Successes:        {actual_successes} ({actual_rate:.2f}%)\n")
     
-    print("--- Model A: Azxten Formula ---")
-    print(f"Expected Successes:      {exp_successes_a:.2f} ({exp_rate_a:.2f}%)")
-    print(f"Brier Score:             {brier_a:.4f}")
-    print(f"Total Error:             {abs(actual_rate - exp_rate_a):.2f}%")
-    print_calibration_table(bins_a, "Model A (Azxten)")
-    
-    print("\n" + "="*50 + "\n")
-    
-    print("--- Model B: EQEmu Formula ---")
-    print(f"Expected Successes:      {exp_successes_b:.2f} ({exp_rate_b:.2f}%)")
-    print(f"Brier Score:             {brier_b:.4f}")
-    print(f"Total Error:             {abs(actual_rate - exp_rate_b):.2f}%")
-    print_calibration_table(bins_b, "Model B (EQEmu)")
+    for index, (name, model_stats) in enumerate(stats['models'].items()):
+        if index > 0:
+            print("\n" + "="*50 + "\n")
+
+        brier = model_stats['brier_sum'] / total_events
+        exp_rate = (model_stats['expected'] / total_events) * 100
+        letter = chr(ord('A') + index)
+
+        print(f"--- {model_label(index, name)} Formula ---")
+        print(f"Expected Successes:      {model_stats['expected']:.2f} ({exp_rate:.2f}%)")
+        print(f"Brier Score:             {brier:.4f}")
+        print(f"Total Error:             {abs(actual_rate - exp_rate):.2f}%")
+        print_calibration_table(model_stats['bins'], f"Model {letter} ({name})")
+
+    return stats
 
 if __name__ == '__main__':
+    import sample_report
+
+    parser = argparse.ArgumentParser(description="Compare the channeling models against recorded casts.")
+    parser.add_argument('--sample', type=float, nargs='?', const=sample_report.DEFAULT_BRIER_PRECISION, metavar='PRECISION',
+                        help="Quick look: read random CSV chunks until every Brier score is within +/- PRECISION (95%% CI)")
+    args = parser.parse_args()
+
     INPUT_CSV = "channeling_data_cleaned.csv"
-    compare_models(INPUT_CSV)
+    if args.sample is not None:
+        print(f"Sampling data from {INPUT_CSV}...\n")
+        sample_report.print_sample_model_report(sample_report.sample_models(INPUT_CSV, args.sample))
+    else:
+        compare_models(INPUT_CSV)
@@ -0,0 +1,252 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import event_store
+import model_compare
+
+# Predictions are clipped to [EPS, 1 - EPS] for log-loss, since both formulas clamp to exactly 0 or 1
+EPS = 1e-6
+
+# Columns shared with the worker processes, and their dtypes
+COLUMNS = {
+    'skill': np.int32,
+    'level': np.int32,
+    'level_gap': np.int32,
+    'hits': np.int32,
+    'outcome': np.int8,
+    'fold': np.int16,
+}
+
+def azxten_array(skill, level, level_gap, hits):
+    """Vectorized model_compare.calc_azxten: ((max(39, min(370, skill + 5 + level + level_gap * 3))) / 391) ** hits"""
+    clamped = np.clip(skill + 5 + level + level_gap * 3, 39, 370)
+    return np.clip((clamped / 391.0) ** hits, 0.0, 1.0)
+
+def eqemu_array(skill, level, level_gap, hits):
+    """Vectorized model_compare.calc_eqemu: (30 + (skill / 400 * 100) - (hits * 2)) / 100"""
+    return np.clip((30 + skill / 400.0 * 100 - hits * 2) / 100.0, 0.0, 1.0)
+
+# Fast vectorized versions of model_compare.MODELS entries, keyed by the same name.
+# Any model without one here is still scored, through np.vectorize of its scalar formula.
+ARRAY_MODELS = {
+    'Azxten': azxten_array,
+    'EQEmu': eqemu_array,
+}
+
+def crossval_models():
+    """Every model in model_compare.MODELS, as a function of column arrays."""
+    unknown = set(ARRAY_MODELS) - set(model_compare.MODELS)
+    if unknown:
+        raise ValueError(f"ARRAY_MODELS has no matching model_compare.MODELS entry: {sorted(unknown)}")
+    return {name: ARRAY_MODELS.get(name) or np.vectorize(model, otypes=[np.float64])
+            for name, model in model_compare.MODELS.items()}
+
+def fit_hits_baseline(hits, outcome):
+    """
+    Empirical baseline fitted on the training fold only: the (smoothed) success
+    rate for each hit count, falling back to the overall rate for unseen counts.
+    Gives the fixed formulas an out-of-sample yardstick.
+    """
+    max_hits = int(hits.max()) if len(hits) else 0
+    successes = np.bincount(hits, weights=outcome, minlength=max_hits + 1)
+    totals = np.bincount(hits, minlength=max_hits + 1)
+    overall = (outcome.sum() + 1) / (len(outcome) + 2)
+    rates = (successes + overall) / (totals + 1)
+
+    def predict(skill, level, level_gap, test_hits):
+        predicted = np.full(len(test_hits), overall)
+        seen = test_hits <= max_hits
+        predicted[seen] = rates[test_hits[seen]]
+        return predicted
+    return predict
+
+def score(predicted, outcome):
+    """Brier score and log-loss for a set of predictions."""
+    brier = float(np.mean((predicted - outcome) ** 2))
+    p = np.clip(predicted, EPS, 1 - EPS)
+    log_loss = float(-np.mean(outcome * np.log(p) + (1 - outcome) * np.log(1 - p)))
+    return brier, log_loss
+
+def load_events(source, **filters):
+    """
+    Reads events into column arrays, ordered chronologically when the source is
+    an event store (log files by first timestamp, then byte offset). Also returns
+    a per-row log file group id used by the time-ordered split.
+    """
+    columns = {name: [] for name in ('skill', 'level', 'level_gap', 'hits', 'outcome')}
+    files = []
+
+    if event_store.is_store_path(source):
+        file_start = {}
+        for event in event_store.query_events(source, **filters):
+            columns['skill'].append(event['skill'])
+            columns['level'].append(event['level'])
+            columns['level_gap'].append(event['level_gap'])
+            columns['hits'].append(event['hits'])
+            columns['outcome'].append(1 if event['result'].lower() == 'success' else 0)
+            files.append(event['file'])
+            if event['file'] not in file_start or (event['timestamp'] or '') < file_start[event['file']]:
+                file_start[event['file']] = event['timestamp'] or ''
+        file_order = {name: rank for rank, name in enumerate(sorted(file_start, key=lambda f: (file_start[f], f)))}
+        groups = np.array([file_order[f] for f in files], dtype=np.int32)
+    else:
+        # The CSV has no file or timestamp, and its rows follow directory listing order rather
+        # than time, so every row is its own group and only the shuffled k-fold split applies
+        with event_store.read_rows(source, **filters) as reader:
+            for row in reader:
+                try:
+                    skill = int(row['channeling skill'])
+                    level = int(row['level'])
+                    hits = int(row['hits'])
+                    level_gap_str = row.get('level gap', '0')
+                    level_gap = int(level_gap_str) if level_gap_str.strip() else 0
+                    result = row['result'].strip().lower()
+                except (ValueError, KeyError):
+                    continue
+                columns['skill'].append(skill)
+                columns['level'].append(level)
+                columns['level_gap'].append(level_gap)
+                columns['hits'].append(hits)
+                columns['outcome'].append(1 if result == 'success' else 0)
+        groups = np.arange(len(columns['hits']), dtype=np.int32)
+
+    arrays = {name: np.array(values, dtype=COLUMNS[name]) for name, values in columns.items()}
+
+    # Stable sort keeps byte order within each log file
+    order = np.argsort(groups, kind='stable')
+    arrays = {name: values[order] for name, values in arrays.items()}
+    return arrays, groups[order]
+
+def assign_folds(groups, k, scheme, seed=0):
+    """
+    kfold: rows shuffled into k folds.
+    time:  k contiguous chronological blocks, never splitting a log file across folds.
+    """
+    n = len(groups)
+    if scheme == 'kfold':
+        rng = np.random.default_rng(seed)
+        return (rng.permutation(n) % k).astype(COLUMNS['fold'])
+
+    # groups is sorted, so the row index where each group starts gives its position in time
+    unique_groups, group_start = np.unique(groups, return_index=True)
+    group_fold = np.minimum(group_start * k // max(n, 1), k - 1)
+    return group_fold[np.searchsorted(unique_groups, groups)].astype(COLUMNS['fold'])
+
+# Worker process state: numpy views onto the parent's shared memory blocks
+_shared = {}
+_arrays = {}
+
+def _attach(layout):
+    """Pool initializer: maps the parent's shared memory into this worker without copying it."""
+    for name, (shm_name, dtype, length) in layout.items():
+        shm = shared_memory.SharedMemory(name=shm_name)
+        _shared[name] = shm
+        _arrays[name] = np.ndarray((length,), dtype=dtype, buffer=shm.buf)
+
+def evaluate_fold(fold, scheme):
+    """Scores every model on one held-out fold. Only this fold's indices are materialized."""
+    fold_ids = _arrays['fold']
+    test = np.flatnonzero(fold_ids == fold)
+    # Time-ordered folds train only on the past (forward chaining)
+    train = np.flatnonzero(fold_ids < fold) if scheme == 'time' else np.flatnonzero(fold_ids != fold)
+    if not len(test):
+        return fold, 0, len(train), {}
+
+    features = [_arrays[name][test] for name in ('skill', 'level', 'level_gap', 'hits')]
+    outcome = _arrays['outcome'][test].astype(np.float64)
+
+    results = {}
+    for name, model in crossval_models().items():
+        results[name] = score(model(*features), outcome)
+
+    if len(train):
+        baseline = fit_hits_baseline(_arrays['hits'][train], _arrays['outcome'][train].astype(np.float64))
+        results['Hits Baseline'] = score(baseline(*features), outcome)
+
+    return fold, len(test), len(train), results
+
+def cross_validate(source, k=5, scheme='kfold', seed=0, workers=None, **filters):
+    """
+    Runs k-fold or time-ordered cross-validation with folds evaluated in parallel.
+    The event arrays are placed in shared memory once; workers only receive the
+    fold number, so the dataset is never pickled or copied per worker.
+    """
+    if scheme == 'time' and not event_store.is_store_path(source):
+        raise ValueError(f"Time-ordered cross-validation needs an SQLite event store, not {source}")
+    # Fold 0 of a time-ordered split has no past to train on and is never scored
+    min_folds = 3 if scheme == 'time' else 2
+    if k < min_folds:
+        raise ValueError(f"{scheme} cross-validation needs at least {min_folds} folds (got {k})")
+
+    arrays, groups = load_events(source, **filters)
+    n = len(arrays['hits'])
+    if n < k:
+        print(f"Not enough events for {k} folds ({n} found).")
+        return None
+    if scheme == 'time' and len(np.unique(groups)) < k:
+        print(f"Time-ordered split needs at least {k} log files ({len(np.unique(groups))} found).")
+        return None
+    arrays['fold'] = assign_folds(groups, k, scheme, seed)
+
+    blocks = []
+    layout = {}
+    try:
+        for name, values in arrays.items():
+            shm = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+            blocks.append(shm)
+            np.ndarray(values.shape, dtype=values.dtype, buffer=shm.buf)[:] = values
+            layout[name] = (shm.name, values.dtype, n)
+        del arrays
+
+        # The first time-ordered block has no past to train on, so it is not scored
+        folds = range(1, k) if scheme == 'time' else range(k)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach, initargs=(layout,)) as pool:
+            fold_results = list(pool.map(evaluate_fold, folds, [scheme] * len(folds)))
+    finally:
+        for shm in blocks:
+            shm.close()
+            shm.unlink()
+
+    return fold_results
+
+def print_crossval_report(fold_results, scheme):
+    print(f"=== {scheme} Cross-Validation Report ===")
+    print(f"{'Fold':<5} | {'Test':<8} | {'Train':<8} | {'Model':<14} | {'Brier':<7} | {'Log-loss':<8}")
+    print("-" * 63)
+    for fold, n_test, n_train, results in fold_results:
+        for name, (brier, log_loss) in results.items():
+            print(f"{fold:<5} | {n_test:<8} | {n_train:<8} | {name:<14} | {brier:.4f} | {log_loss:.4f}")
+
+    print("\n=== Mean Across Folds (std) ===")
+    print(f"{'Model':<14} | {'Brier':<16} | {'Log-loss':<16}")
+    print("-" * 52)
+    model_names = list(dict.fromkeys(name for _, _, _, results in fold_results for name in results))
+    for name in model_names:
+        scores = np.array([results[name] for _, _, _, results in fold_results if name in results])
+        brier = f"{scores[:, 0].mean():.4f} ({scores[:, 0].std():.4f})"
+        log_loss = f"{scores[:, 1].mean():.4f} ({scores[:, 1].std():.4f})"
+        print(f"{name:<14} | {brier:<16} | {log_loss:<16}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Out-of-sample scoring of the channeling models.")
+    parser.add_argument('source', nargs='?', default="channeling_data_cleaned.csv",
+                        help="Cleaned channeling CSV or SQLite event store (.db)")
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--scheme', choices=['kfold', 'time'], default='kfold',
+                        help="Shuffled k-fold, or contiguous chronological blocks trained only on earlier logs (requires an event store)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+    if args.scheme == 'time' and not event_store.is_store_path(args.source):
+        parser.error("--scheme time requires an SQLite event store source")
+    if args.folds < (3 if args.scheme == 'time' else 2):
+        parser.error(f"--scheme {args.scheme} needs at least {3 if args.scheme == 'time' else 2} folds")
+
+    print(f"Reading data from {args.source}...\n")
+    results = cross_validate(args.source, args.folds, args.scheme, args.seed, args.workers)
+    if results:
+        print_crossval_report(results, args.scheme)
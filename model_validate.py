@@ -1,4 +1,4 @@
-import csv
+import event_store
 
 def calculate_probability(skill, level, level_gap, hits):
     """
@@ -14,7 +14,9 @@ def calculate_probability(skill, level, level_gap, hits):
     # Probability of succeeding all independent checks (one per hit)
     return single_hit_chance ** hits
 
-def validate_model(csv_file):
+def validate_model(csv_file, **filters):
+    # csv_file may also be an SQLite event store (.db), in which case filters such as
+    # spell='Gate' or min_skill=150 are applied by the database (see event_store.FILTERS)
     total_events = 0
     actual_successes = 0
     expected_successes = 0.0
@@ -26,9 +28,8 @@ def validate_model(csv_file):
 
     print(f"Reading data from {csv_file}...\n")
     
-    with open(csv_file, 'r', encoding='utf-8') as f:
-        # Use DictReader to easily access columns by name
-        reader = csv.DictReader(f)
+    # Rows are dicts keyed by CSV column name, whether read from a CSV or the event store
+    with event_store.read_rows(csv_file, **filters) as reader:
         
         for row in reader:
             try:
@@ -0,0 +1,260 @@
+import argparse
+import contextlib
+import csv
+import io
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+import channel_parse
+import event_parse
+import event_store
+import sample_report
+
+# Generated logs deliberately exercise the rules a faster parser is most likely to get wrong:
+# stunned interrupts, zero-hit casts, the "You have been \w+." hit variant, skill and level
+# changes mid-cast, casts that never resolve, untimestamped lines, CRLF endings and bad UTF-8.
+SPELLS = ['Gate', 'Complete Heal', "Shield of Thorns", "Tears of Solusek", "Wrath of Nature", "Sebilite Pox"]
+TITLES = ['Hierophant', 'Druid', 'Cleric', 'High Priest', 'Enchanter', 'Phantasmist']
+HIT_LINES = [
+    "A gnoll hits YOU for {damage} points of damage.",
+    "A cave bear mauls YOU for {damage} points of damage.",
+    "You have been bashed.",
+    "You have been kicked.",
+]
+NEAR_MISS_LINES = [
+    "A gnoll tries to hit YOU, but misses!",
+    "You have been knocked unconscious!",
+    "You hit a gnoll for {damage} points of damage.",
+    "A gnoll hits YOU for {damage} points of damage",
+]
+NOISE_LINES = [
+    "Soandso says, 'heal please'",
+    "Your target is too far away, get closer!",
+    "You feel a little better.",
+    "Soandso tells you, 'it hits YOU for {damage} points of damage.'",
+    "LOADING, PLEASE WAIT...",
+]
+
+def generate_eqlog(rng, char_name, n_casts):
+    """Returns the raw bytes of a randomized eqlog for one character."""
+    stamp = datetime(2026, 2, 9, 20, 0, 0)
+    lines = []
+
+    def emit(message, timestamped=True):
+        nonlocal stamp
+        stamp += timedelta(seconds=rng.randint(0, 3))
+        if timestamped:
+            lines.append(f"[{stamp.strftime(event_parse.EQ_TIME_FORMAT)}] {message}".encode('utf-8'))
+        else:
+            lines.append(message.encode('utf-8'))
+
+    level = rng.randint(20, 59)
+    skill = rng.randint(50, 200)
+
+    # Baseline lines for event_parse's first pass, in a random order
+    baseline = [
+        f"[{level} {rng.choice(TITLES)}] {char_name} (Wood Elf) <Guild>",
+        f"You have become better at Channeling! ({skill})",
+    ]
+    rng.shuffle(baseline)
+    for message in baseline:
+        emit(message)
+
+    for _ in range(n_casts):
+        emit(f"You begin casting {rng.choice(SPELLS)}.")
+        for _ in range(rng.choice([0, 0, 1, 1, 2, 3, 5])):
+            roll = rng.random()
+            if roll < 0.55:
+                emit(rng.choice(HIT_LINES).format(damage=rng.randint(1, 200)))
+            elif roll < 0.65:
+                emit("You are stunned!")
+            elif roll < 0.75:
+                emit(rng.choice(NEAR_MISS_LINES).format(damage=rng.randint(1, 200)))
+            elif roll < 0.82:
+                skill += 1
+                emit(f"You have become better at Channeling! ({skill})")
+            elif roll < 0.85:
+                level += 1
+                emit(f"You have gained a level! Welcome to level {level}!")
+            elif roll < 0.90:
+                emit(rng.choice(NOISE_LINES).format(damage=rng.randint(1, 200)), timestamped=False)
+            else:
+                emit(rng.choice(NOISE_LINES).format(damage=rng.randint(1, 200)))
+                if rng.random() < 0.3:
+                    lines[-1] += b' \xff\xfe'
+
+        roll = rng.random()
+        if roll < 0.45:
+            emit("You regain your concentration and continue your casting.")
+        elif roll < 0.9:
+            emit("Your spell is interrupted.")
+        # Otherwise the cast never resolves and the next "You begin casting" takes over
+
+    newline = b'\r\n' if rng.random() < 0.5 else b'\n'
+    return newline.join(lines) + newline
+
+def write_log_dir(directory, seed, n_files, n_casts):
+    """Writes n_files generated logs for distinct characters. Returns the total bytes written."""
+    rng = random.Random(seed)
+    total = 0
+    for i in range(n_files):
+        char_name = 'Char' + ''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(6))
+        data = generate_eqlog(rng, char_name, n_casts)
+        with open(os.path.join(directory, f"eqlog_{char_name}_P1999Green.txt"), 'wb') as f:
+            f.write(data)
+        total += len(data)
+    return total
+
+def add_redundant_copies(source_dir, target_dir, seed):
+    """
+    Copies every log, plus exact backups and truncated (rotated) copies of some of them.
+    Copy names sort both after ('..._backup.txt') and before ('Copy of ...', 'backup_...')
+    the original, so the check also covers which of two identical copies dedup keeps.
+    """
+    rng = random.Random(seed)
+    for name in sorted(os.listdir(source_dir)):
+        if not name.endswith('.txt'):
+            continue
+        source = os.path.join(source_dir, name)
+        shutil.copyfile(source, os.path.join(target_dir, name))
+        stem = name[:-len('.txt')]
+        for backup_name in (f"{stem}_backup.txt", f"backup_{name}", f"Copy of {name}"):
+            if rng.random() < 0.5:
+                shutil.copyfile(source, os.path.join(target_dir, backup_name))
+        for rotated_name in (f"{stem}_rotated.txt", f"old_{name}"):
+            if rng.random() < 0.5:
+                with open(source, 'rb') as f:
+                    data = f.read()
+                with open(os.path.join(target_dir, rotated_name), 'wb') as f:
+                    f.write(data[:rng.randint(1, len(data))])
+
+# Parser modes. Each family maps a mode name to a function of the log directory; the first
+# entry of each family is the reference behavior every other mode must reproduce exactly.
+# New optimized paths (bytes/mmap, parallel, prefiltered, ...) register themselves here.
+
+def run_channel_parse(directory):
+    success_tally, failure_tally = channel_parse.analyze_eq_casting_logs(directory)
+    return dict(success_tally), dict(failure_tally)
+
+def run_event_parse_csv(directory):
+    output_csv = os.path.join(directory, 'events.out.csv')
+    event_parse.analyze_eq_casting_logs(directory, output_csv)
+    with open(output_csv, 'r', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        next(reader)
+        return [(int(r[0]), int(r[1]), r[2], r[3], int(r[4]), r[5]) for r in reader]
+
+def run_event_parse_store(directory):
+    db_path = os.path.join(directory, 'events.out.db')
+    event_parse.analyze_eq_casting_logs(directory, None, db_path)
+    return [(e['skill'], e['level'], e['class'], e['spell'], e['hits'], e['result'])
+            for e in event_store.query_events(db_path)]
+
+def run_chunked_tallies(directory):
+    # Small chunks so that most casts straddle or sit near a chunk boundary
+    success_tally, failure_tally = sample_report.chunked_tallies(directory, chunk_size=4096)
+    return dict(success_tally), dict(failure_tally)
+
+TALLY_MODES = {
+    'channel_parse': run_channel_parse,
+    'sample_report:chunked': run_chunked_tallies,
+}
+
+EVENT_MODES = {
+    'event_parse:csv': run_event_parse_csv,
+    'event_parse:store': run_event_parse_store,
+}
+
+def run_quietly(mode, directory):
+    """Runs a mode with the parsers' progress output suppressed. Returns (result, seconds)."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        result = mode(directory)
+        return result, time.perf_counter() - start
+
+def first_difference(expected, actual):
+    """Describes where two results first diverge."""
+    if isinstance(expected, list):
+        for index, (a, b) in enumerate(zip(expected, actual)):
+            if a != b:
+                return f"event {index}: expected {a}, got {b}"
+        return f"expected {len(expected)} events, got {len(actual)}"
+    return f"expected {expected}, got {actual}"
+
+def check_family(family, clean_dir, copies_dir, timings):
+    """Runs every mode of a family on both directories. Returns a list of mismatch descriptions."""
+    failures = []
+    reference_name = next(iter(family))
+    reference = None
+
+    for name, mode in family.items():
+        result, seconds = run_quietly(mode, clean_dir)
+        timings.setdefault(name, 0.0)
+        timings[name] += seconds
+        if reference is None:
+            reference = result
+        elif result != reference:
+            failures.append(f"{name} != {reference_name}: {first_difference(reference, result)}")
+
+        # Redundant copies must be skipped. File order differs between the two directories,
+        # so event sequences are compared as multisets here.
+        copied, _ = run_quietly(mode, copies_dir)
+        if isinstance(reference, list):
+            matches = Counter(copied) == Counter(reference)
+        else:
+            matches = copied == reference
+        if not matches:
+            failures.append(f"{name} with redundant copies != {reference_name}: {first_difference(reference, copied)}")
+
+    return failures
+
+def run_harness(rounds, seed, n_files, n_casts):
+    timings = {}
+    total_bytes = 0
+    failures = []
+
+    for round_index in range(rounds):
+        round_seed = seed + round_index
+        with tempfile.TemporaryDirectory() as clean_dir, tempfile.TemporaryDirectory() as copies_dir:
+            total_bytes += write_log_dir(clean_dir, round_seed, n_files, n_casts)
+            add_redundant_copies(clean_dir, copies_dir, round_seed)
+
+            for family in (TALLY_MODES, EVENT_MODES):
+                for failure in check_family(family, clean_dir, copies_dir, timings):
+                    failures.append(f"[seed {round_seed}] {failure}")
+
+    print("=== Parser Equivalence Report ===")
+    print(f"Rounds: {rounds}, files per round: {n_files}, casts per file: {n_casts}")
+    print(f"Log data per mode: {total_bytes / 1e6:.2f} MB\n")
+
+    print(f"{'Mode':<25} | {'MB/s':<8} | {'Relative'}")
+    print("-" * 48)
+    for family in (TALLY_MODES, EVENT_MODES):
+        reference_time = timings[next(iter(family))]
+        for name in family:
+            throughput = total_bytes / 1e6 / timings[name] if timings[name] else float('inf')
+            print(f"{name:<25} | {throughput:<8.2f} | {reference_time / timings[name]:.2f}x")
+
+    if failures:
+        print(f"\n{len(failures)} mismatches found:")
+        for failure in failures:
+            print(f"  [!] {failure}")
+    else:
+        print("\nAll parser modes produced identical events and tallies.")
+    return not failures
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check that every parser mode matches the reference parsers on random eqlogs.")
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--files', type=int, default=4)
+    parser.add_argument('--casts', type=int, default=2000)
+    args = parser.parse_args()
+
+    sys.exit(0 if run_harness(args.rounds, args.seed, args.files, args.casts) else 1)
@@ -0,0 +1,255 @@
+import csv
+import math
+import os
+import random
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import channel_parse
+import log_fingerprint
+import model_compare
+
+# Logs are split into byte-range chunks; a log smaller than one chunk is sampled as a whole file
+CHUNK_SIZE = 1024 * 1024
+CSV_CHUNK_SIZE = 256 * 1024
+
+# Chunks parsed before the first estimate; the sample then doubles until the precision is met
+INITIAL_CHUNKS = 16
+
+# 95% confidence intervals
+Z = 1.96
+
+DEFAULT_RATE_PRECISION = 0.01
+DEFAULT_BRIER_PRECISION = 0.005
+
+def plan_chunks(paths, chunk_size):
+    """Splits each file into (path, start, end) byte ranges."""
+    chunks = []
+    for path in paths:
+        # Opened here so a dangling link or directory is skipped, as channel_parse skips it
+        try:
+            with open(path, 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+        except OSError as e:
+            print(f"Error reading {path}: {e}")
+            continue
+        for start in range(0, size, chunk_size):
+            chunks.append((str(path), start, min(start + chunk_size, size)))
+    return chunks
+
+def read_chunk_lines(path, start, end, is_boundary):
+    """
+    Yields the decoded lines of the byte range [start, end) of a file.
+
+    A record (e.g. one cast) belongs to the chunk its first line starts in: lines
+    before the first boundary line are skipped (resync), and lines past `end`
+    are still yielded until the next boundary, so a record that straddles two
+    chunks is read exactly once. Parsing every chunk this way gives the same
+    result as parsing the whole file.
+    """
+    with open(path, 'rb') as f:
+        position = start
+        if start > 0:
+            # Drop the partial line we landed in (reading from start - 1 keeps a line that begins exactly at start)
+            f.seek(start - 1)
+            position = start - 1 + len(f.readline())
+
+        synced = False
+        for raw_line in f:
+            line_start = position
+            position += len(raw_line)
+
+            line = raw_line.decode('utf-8', errors='ignore')
+            boundary = is_boundary(line)
+            if line_start >= end and (boundary or not synced):
+                return
+            if not synced:
+                if not boundary:
+                    continue
+                synced = True
+            yield line
+
+def tally_chunk(chunk):
+    """channel_parse tallies for the casts that start inside one chunk."""
+    path, start, end = chunk
+    success_tally = Counter()
+    failure_tally = Counter()
+    channel_parse.tally_casts(read_chunk_lines(path, start, end, channel_parse.is_cast_start),
+                              success_tally, failure_tally)
+    return success_tally, failure_tally
+
+def chunked_tallies(directory_path, chunk_size=CHUNK_SIZE):
+    """Exact tallies from parsing every chunk. Must match channel_parse.analyze_eq_casting_logs."""
+    success_tally = Counter()
+    failure_tally = Counter()
+    for successes, failures in map(tally_chunk, plan_chunks(log_fingerprint.unique_log_files(directory_path), chunk_size)):
+        success_tally.update(successes)
+        failure_tally.update(failures)
+    return success_tally, failure_tally
+
+def total_estimate(values, population):
+    """Population total from a simple random sample of chunk values, with its 95% CI half-width."""
+    n = len(values)
+    total = sum(values)
+    if n >= population:
+        return total, 0.0
+    if n < 2:
+        return population * total / max(n, 1), math.inf
+    mean = total / n
+    variance = sum((v - mean) ** 2 for v in values) / (n - 1)
+    return population * mean, Z * population * math.sqrt((1 - n / population) * variance / n)
+
+def ratio_estimate(numerators, denominators, population):
+    """
+    Ratio sum(numerators) / sum(denominators) from a random sample of chunks, with its
+    95% CI half-width (linearized variance for cluster samples, finite population corrected).
+    """
+    n = len(numerators)
+    total_denominator = sum(denominators)
+    if total_denominator == 0:
+        return None, math.inf
+    ratio = sum(numerators) / total_denominator
+    if n >= population:
+        return ratio, 0.0
+    if n < 2:
+        return ratio, math.inf
+    mean_denominator = total_denominator / n
+    variance = sum((y - ratio * x) ** 2 for y, x in zip(numerators, denominators)) / (n - 1)
+    return ratio, Z * math.sqrt((1 - n / population) * variance / n) / mean_denominator
+
+def parse_sample(chunks, parse_chunk, enough, workers=None):
+    """
+    Parses a growing random sample of chunks until enough(results) says the estimate is
+    precise enough or every chunk has been parsed. Each round doubles the sample and
+    parses the new chunks in parallel.
+    """
+    results = []
+    target = min(INITIAL_CHUNKS, len(chunks))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while True:
+            results.extend(pool.map(parse_chunk, chunks[len(results):target]))
+            if target == len(chunks) or enough(results):
+                return results
+            target = min(target * 2, len(chunks))
+
+def estimate_tallies(results, population):
+    """Estimated channel_parse report figures, each as an (estimate, 95% CI half-width) pair."""
+    all_hit_counts = set()
+    for successes, failures in results:
+        all_hit_counts.update(successes.keys(), failures.keys())
+
+    success_counts = [sum(successes.values()) for successes, _ in results]
+    failure_counts = [sum(failures.values()) for _, failures in results]
+    estimate = {
+        'chunks_sampled': len(results),
+        'chunks_total': population,
+        'successes': total_estimate(success_counts, population),
+        'failures': total_estimate(failure_counts, population),
+        'success_rate': ratio_estimate(success_counts, [s + f for s, f in zip(success_counts, failure_counts)], population),
+        'hits': {},
+    }
+    for hits in sorted(all_hit_counts):
+        successes = [s.get(hits, 0) for s, _ in results]
+        failures = [f.get(hits, 0) for _, f in results]
+        estimate['hits'][hits] = {
+            'successes': total_estimate(successes, population),
+            'failures': total_estimate(failures, population),
+            'success_rate': ratio_estimate(successes, [s + f for s, f in zip(successes, failures)], population),
+        }
+    return estimate
+
+def sample_tallies(directory_path, precision=DEFAULT_RATE_PRECISION, chunk_size=CHUNK_SIZE, seed=None, workers=None):
+    """
+    Quick-look channel_parse report from a random sample of log chunks, grown until the
+    overall success rate is known to within +/- precision (95% CI).
+    """
+    chunks = plan_chunks(log_fingerprint.unique_log_files(directory_path), chunk_size)
+    random.Random(seed).shuffle(chunks)
+
+    def enough(results):
+        return estimate_tallies(results, len(chunks))['success_rate'][1] <= precision
+
+    results = parse_sample(chunks, tally_chunk, enough, workers)
+    return estimate_tallies(results, len(chunks))
+
+def aggregate_csv_chunk(chunk):
+    """model_compare aggregates for the rows of one byte range of a channeling CSV."""
+    path, start, end = chunk
+    with open(path, 'r', encoding='utf-8') as f:
+        header = next(csv.reader(f))
+    # Every CSV line is its own record; the header row fails to parse and is skipped
+    lines = read_chunk_lines(path, start, end, lambda line: True)
+    return model_compare.aggregate_rows(csv.DictReader(lines, fieldnames=header))
+
+def estimate_models(results, population):
+    """Estimated model_compare figures, each as an (estimate, 95% CI half-width) pair."""
+    events = [stats['total_events'] for stats in results]
+    estimate = {
+        'chunks_sampled': len(results),
+        'chunks_total': population,
+        'total_events': total_estimate(events, population),
+        'success_rate': ratio_estimate([stats['actual_successes'] for stats in results], events, population),
+        'models': {},
+    }
+    for name in model_compare.MODELS:
+        estimate['models'][name] = {
+            'brier': ratio_estimate([stats['models'][name]['brier_sum'] for stats in results], events, population),
+            'expected_rate': ratio_estimate([stats['models'][name]['expected'] for stats in results], events, population),
+        }
+    return estimate
+
+def sample_models(csv_file, precision=DEFAULT_BRIER_PRECISION, chunk_size=CSV_CHUNK_SIZE, seed=None, workers=None):
+    """
+    Quick-look model_compare report from a random sample of CSV chunks, grown until every
+    model's Brier score is known to within +/- precision (95% CI).
+    """
+    chunks = plan_chunks([csv_file], chunk_size)
+    random.Random(seed).shuffle(chunks)
+
+    def enough(results):
+        models = estimate_models(results, len(chunks))['models']
+        return all(model['brier'][1] <= precision for model in models.values())
+
+    results = parse_sample(chunks, aggregate_csv_chunk, enough, workers)
+    return estimate_models(results, len(chunks))
+
+def format_estimate(value, half_width, percent=False, digits=2):
+    """e.g. '55.30% +/- 1.20%' or '1234 +/- 56'."""
+    if value is None:
+        return "n/a"
+    scale = 100 if percent else 1
+    suffix = '%' if percent else ''
+    if half_width == 0:
+        return f"{value * scale:.{digits}f}{suffix} (exact)"
+    if math.isinf(half_width):
+        return f"{value * scale:.{digits}f}{suffix} +/- ?"
+    return f"{value * scale:.{digits}f}{suffix} +/- {half_width * scale:.{digits}f}{suffix}"
+
+def print_sample_report(estimate):
+    print("=== EverQuest Casting Channel Report (sampled) ===")
+    print(f"Chunks parsed: {estimate['chunks_sampled']} of {estimate['chunks_total']} (95% confidence intervals)")
+    print(f"Total successful casts (while being hit): {format_estimate(*estimate['successes'], digits=0)}")
+    print(f"Total interrupted casts (while being hit): {format_estimate(*estimate['failures'], digits=0)}")
+    print(f"Success rate: {format_estimate(*estimate['success_rate'], percent=True)}")
+    print("-" * 40)
+
+    if not estimate['hits']:
+        print("No hits during casting were found in the sampled logs.")
+        return
+
+    print(f"{'Hits Taken':<11} | {'Successful Casts':<20} | {'Failed Casts':<20} | {'Success Rate':<20}")
+    print("-" * 80)
+    for hits, data in estimate['hits'].items():
+        print(f"{hits:<11} | {format_estimate(*data['successes'], digits=0):<20} | "
+              f"{format_estimate(*data['failures'], digits=0):<20} | {format_estimate(*data['success_rate'], percent=True):<20}")
+
+def print_sample_model_report(estimate):
+    print("=== Model Comparison (sampled) ===")
+    print(f"Chunks parsed: {estimate['chunks_sampled']} of {estimate['chunks_total']} (95% confidence intervals)")
+    print(f"Total Events Evaluated:  {format_estimate(*estimate['total_events'], digits=0)}")
+    print(f"Actual Success Rate:     {format_estimate(*estimate['success_rate'], percent=True)}\n")
+
+    for index, (name, model) in enumerate(estimate['models'].items()):
+        print(f"--- {model_compare.model_label(index, name)} Formula ---")
+        print(f"Expected Success Rate:   {format_estimate(*model['expected_rate'], percent=True)}")
+        print(f"Brier Score:             {format_estimate(*model['brier'], digits=4)}\n")